@@ -1,16 +1,41 @@
 import argparse
 import asyncio
+import contextlib
+import importlib.util
 import json
 import logging
-import re
+import random
+import shutil
+import socket
 import subprocess
 import sys
 import time
 from datetime import datetime
 from pathlib import Path
 
-# curl_cffi: 브라우저 위장을 위한 필수 라이브러리
-from curl_cffi.requests import AsyncSession
+# orjson: C 구현 JSON 파서 (없으면 표준 라이브러리로 폴백)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson: 스트리밍 JSON 파서 (없으면 전체 파싱으로 폴백)
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# curl_cffi(브라우저 위장 필수 라이브러리)는 libcurl-impersonate 로드 비용이 커서
+# --help나 인자 오류 경로가 대가를 치르지 않도록 세션 생성 시점에 로드합니다.
+AsyncSession = None
+CurlHttpVersion = None
+CurlOpt = None
+
+def _load_curl_cffi():
+    global AsyncSession, CurlHttpVersion, CurlOpt
+    if AsyncSession is None:
+        from curl_cffi import CurlHttpVersion, CurlOpt
+        from curl_cffi.requests import AsyncSession
 
 # --- 설정 파일 이름 ---
 CONFIG_FILE = "settings.json"
@@ -28,48 +53,210 @@ STATION_URL = "https://chapi.sooplive.co.kr/api/{streamer_id}/station"
 PLAYER_LIVE_API_URL = "http://live.sooplive.co.kr/afreeca/player_live_api.php"
 VIEW_URL = "https://livestream-manager.sooplive.co.kr/broad_stream_assign.html"
 
+def json_loads(data):
+    """JSON 파싱 헬퍼. orjson이 있으면 bytes를 그대로 넘겨 UTF-8 디코드도 건너뜁니다."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def parse_station(content):
+    """방송국 JSON에서 실제로 쓰는 필드만 추출합니다.
+
+    /station 응답은 대부분 쓰지 않는 중첩 메타데이터라, ijson이 있으면 전체를
+    dict로 만들지 않고 필요한 키만 스트리밍으로 뽑아 폴링당 할당을 줄입니다.
+    """
+    if ijson is None:
+        data = json_loads(content)
+        broad = data.get("broad")
+        station = data.get("station")
+        return {
+            "broad": {"broad_no": broad["broad_no"], "broad_title": broad["broad_title"]} if broad else None,
+            "user_nick": station.get("user_nick") if station else None,
+        }
+
+    result = {"broad": None, "user_nick": None}
+    broad = {}
+    for prefix, _event, value in ijson.parse(content):
+        if prefix == "broad.broad_no":
+            broad["broad_no"] = value
+        elif prefix == "broad.broad_title":
+            broad["broad_title"] = value
+        elif prefix == "station.user_nick":
+            result["user_nick"] = value
+    if broad:
+        result["broad"] = broad
+    return result
+
+class _TokenBucket:
+    """아웃바운드 API 호출을 초당 rate개로 제한하는 비동기 토큰 버킷.
+
+    여러 스트리머를 동시에 감시해도 합산 QPS가 API 한도를 넘어 429를 맞고
+    백오프로 시간을 잃는 일이 없도록 호출을 고르게 펴 줍니다.
+    """
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1.0:
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+                self.tokens = 0.0
+                self.updated = time.monotonic()
+            else:
+                self.tokens -= 1.0
+
+# 모든 레코더가 공유하는 전역 리미터 (settings.json의 "max_qps"로 조정, 0이면 해제)
+_rate_limiter = None
+
+def configure_rate_limit(max_qps):
+    global _rate_limiter
+    _rate_limiter = _TokenBucket(max_qps) if max_qps else None
+
+async def _throttle():
+    """폴링용 API 호출 직전에 호출해 전역 QPS 한도를 지킵니다."""
+    if _rate_limiter is not None:
+        await _rate_limiter.acquire()
+
+# 파일명에 쓸 수 없는 문자 제거용 변환 테이블 (정규식보다 빠른 C 레벨 조회)
+_FN_TRANS = str.maketrans('', '', '\\/*?:"<>|')
+
 def clean_filename(filename):
-    return re.sub(r'[\\/*?:\"<>|]', "", filename)
+    return filename.translate(_FN_TRANS)
 
 def load_config():
     """settings.json 파일을 읽어옵니다."""
     config_path = Path(CONFIG_FILE)
     if config_path.exists():
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                log.info(f"설정 파일({CONFIG_FILE})을 로드했습니다.")
-                return json.load(f)
+            with open(config_path, 'rb') as f:
+                log.info("설정 파일(%s)을 로드했습니다.", CONFIG_FILE)
+                return json_loads(f.read())
         except Exception as e:
-            log.error(f"설정 파일 로드 실패: {e}")
+            log.error("설정 파일 로드 실패: %s", e)
             return {}
     return {}
 
 class SoopRecorder:
-    def __init__(self, streamer_id, output_dir=".", proxy=None, poll_interval=15):
+    # 적응형 폴링 상한 (초)
+    MAX_POLL_INTERVAL = 300
+    MAX_ERROR_INTERVAL = 60
+    BACKOFF_CAP = 5  # 2**5 = 32배까지만 증가
+
+    # 오프라인 상태에서 방송국 JSON을 재사용할 시간 (초)
+    STATION_CACHE_TTL = 60
+
+    # 동시에 받을 HLS 세그먼트 수
+    HLS_CONCURRENCY = 4
+
+    # 파일 쓰기 버퍼 크기 / 플러시 간격 (바이트)
+    WRITE_BUFFER = 1 << 20
+    FLUSH_EVERY = 8 << 20
+
+    # DNS 캐시 TTL (초) - API 호스트는 안정적이므로 폴링마다 재해석할 필요 없음
+    DNS_TTL = 900
+    _RESOLVE_HOSTS = (
+        ("chapi.sooplive.co.kr", 443),
+        ("live.sooplive.co.kr", 80),
+        ("livestream-manager.sooplive.co.kr", 443),
+    )
+
+    def __init__(self, streamer_id, output_dir=".", proxy=None, poll_interval=15, use_streamlink=False,
+                 session=None, direct_session=None):
         self.streamer_id = streamer_id
         self.output_dir = Path(output_dir)
         self.proxy_str = proxy
         self.poll_interval = poll_interval
-        self.session = None
+        self.use_streamlink = use_streamlink
+        self.consecutive_misses = 0
+        self.consecutive_errors = 0
+        # 세션을 주입받으면 (다중 스트리머) 커넥션 풀을 공유하고 수명 관리는 소유자에게 맡김
+        self.session = session
+        self.direct_session = direct_session
+        self._owns_sessions = session is None
+        self._curl_opts = {}
+        self._dns_task = None
+        self._station_cache = {"data": None, "expires": 0.0, "etag": None, "last_modified": None}
+        self._streamlink = None  # 재사용하는 streamlink 파이썬 API 세션
         self.streamer_name = self.streamer_id
 
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        log.info(f"녹화 파일 저장 경로: {self.output_dir.resolve()}")
+        log.info("녹화 파일 저장 경로: %s", self.output_dir.resolve())
 
     async def __aenter__(self):
+        if not self._owns_sessions:
+            # 공유 세션 사용: DNS 캐시 갱신도 세션 소유자가 담당
+            return self
+
+        _load_curl_cffi()
+
         # 인증용 세션에만 프록시를 적용 (AID 획득용)
         proxies = {"http": self.proxy_str, "https": self.proxy_str} if self.proxy_str else None
-        
+
+        # 호스트를 미리 해석해 두면 libcurl이 폴링마다 getaddrinfo를 호출하지 않음
+        self._curl_opts = {
+            CurlOpt.RESOLVE: await self._resolve_hosts(),
+            # 유휴 커넥션을 살려 두어 폴링/세그먼트 요청이 같은 연결을 재사용
+            CurlOpt.TCP_KEEPALIVE: 1,
+            CurlOpt.TCP_KEEPIDLE: 60,
+            CurlOpt.MAXCONNECTS: 16,
+        }
+
         self.session = AsyncSession(
             impersonate="chrome110",  # 브라우저 위장 (그리드 우회 핵심)
             proxies=proxies,
-            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36"}
+            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36"},
+            http_version=CurlHttpVersion.V2TLS,  # HTTPS에서 HTTP/2 멀티플렉싱 사용
+            curl_options=self._curl_opts
+        )
+        # 프록시가 필요 없는 호출(방송국 정보, View URL)용 세션
+        # 매 폴링마다 새 세션을 만들면 TCP+TLS 핸드셰이크 비용이 반복되므로 재사용
+        self.direct_session = AsyncSession(
+            impersonate="chrome110",
+            http_version=CurlHttpVersion.V2TLS,
+            curl_options=self._curl_opts
         )
+
+        self._dns_task = asyncio.create_task(self._refresh_dns())
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if not self._owns_sessions:
+            return
+        if self._dns_task:
+            self._dns_task.cancel()
         if self.session:
             await self.session.close()
+        if self.direct_session:
+            await self.direct_session.close()
+
+    async def _resolve_hosts(self):
+        """API 호스트들을 한 번에 해석합니다. (CurlOpt.RESOLVE 형식: host:port:ip)"""
+        loop = asyncio.get_running_loop()
+        entries = []
+        for host, port in self._RESOLVE_HOSTS:
+            try:
+                infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+                entries.append(f"{host}:{port}:{infos[0][4][0]}")
+            except OSError as e:
+                # 해석 실패 시 해당 호스트만 libcurl의 기본 DNS에 맡김
+                log.debug("DNS 해석 실패 (%s): %s", host, e)
+        return entries
+
+    async def _refresh_dns(self):
+        """TTL마다 백그라운드에서 DNS 캐시를 갱신합니다."""
+        while True:
+            await asyncio.sleep(self.DNS_TTL)
+            entries = await self._resolve_hosts()
+            if entries:
+                # 세션들이 공유하는 dict를 제자리 갱신 -> 이후 요청부터 새 IP 적용
+                self._curl_opts[CurlOpt.RESOLVE] = entries
 
     async def _get_aid_token(self, broad_no):
         """프록시를 이용해 원본 화질 AID 토큰을 요청합니다."""
@@ -81,60 +268,104 @@ class SoopRecorder:
             "type": "aid" 
         }
         try:
-            log.debug(f"AID 토큰 요청 (프록시: {'사용' if self.proxy_str else '미사용'})")
+            log.debug("AID 토큰 요청 (프록시: %s)", "사용" if self.proxy_str else "미사용")
+            await _throttle()
             response = await self.session.post(PLAYER_LIVE_API_URL, data=data, timeout=15)
             response.raise_for_status()
             
             try:
-                res_json = json.loads(response.text)
-            except json.JSONDecodeError:
+                res_json = json_loads(response.content)
+            except ValueError:
                 log.error("서버 응답이 JSON 형식이 아닙니다.")
                 return None
 
-            if res_json.get("CHANNEL", {}).get("RESULT") == 1:
-                return res_json["CHANNEL"]["AID"]
-            else:
-                log.warning(f"AID 토큰 요청 실패 (응답코드: {res_json.get('CHANNEL', {}).get('RESULT')})")
-                return None
+            # .get("CHANNEL", {}) 체인은 키가 없을 때마다 빈 dict를 새로 만들므로 지역 변수로 한 번만 조회
+            channel = res_json.get("CHANNEL")
+            if channel and channel.get("RESULT") == 1:
+                return channel["AID"]
+            log.warning("AID 토큰 요청 실패 (응답코드: %s)", channel.get("RESULT") if channel else None)
+            return None
         except Exception as e:
-            log.error(f"AID 토큰 요청 중 오류 발생: {e}")
+            log.error("AID 토큰 요청 중 오류 발생: %s", e)
             return None
 
+    async def _fetch_station(self):
+        """방송국 JSON을 가져옵니다.
+
+        오프라인 상태가 대부분인 폴링 루프에서 매번 전체 JSON을 다시 받지 않도록
+        짧은 TTL 캐시 + 조건부 요청(If-None-Match / If-Modified-Since)을 사용합니다.
+        """
+        cache = self._station_cache
+        now = time.monotonic()
+        if cache["data"] is not None and now < cache["expires"]:
+            return cache["data"]
+
+        headers = {}
+        if cache["etag"]:
+            headers["If-None-Match"] = cache["etag"]
+        if cache["last_modified"]:
+            headers["If-Modified-Since"] = cache["last_modified"]
+
+        await _throttle()
+        response = await self.direct_session.get(
+            STATION_URL.format(streamer_id=self.streamer_id), headers=headers, timeout=10)
+
+        if response.status_code == 304 and cache["data"] is not None:
+            # 변경 없음 = 여전히 오프라인 -> 캐시 연장
+            cache["expires"] = now + self.STATION_CACHE_TTL
+            return cache["data"]
+
+        response.raise_for_status()
+        data = parse_station(response.content)
+
+        cache["data"] = data
+        cache["etag"] = response.headers.get("ETag")
+        cache["last_modified"] = response.headers.get("Last-Modified")
+        # 방송 중에는 캐시하지 않음 (종료/제목 변경을 바로 반영해야 함)
+        cache["expires"] = now if data["broad"] else now + self.STATION_CACHE_TTL
+        return data
+
+    async def _get_view(self, broad_no):
+        """View URL을 요청합니다. (QPS 리미터 적용)"""
+        await _throttle()
+        params = { "return_type": "gcp_cdn", "broad_key": f"{broad_no}-common-original-hls" }
+        return await self.direct_session.get(VIEW_URL, params=params, timeout=10)
+
     async def check_stream_status(self):
         """방송 상태 확인 및 스트림 정보 획득"""
         try:
             # 방송국 정보는 프록시 없이 직접 호출 (속도 향상)
-            async with AsyncSession(impersonate="chrome110") as temp_session:
-                response = await temp_session.get(STATION_URL.format(streamer_id=self.streamer_id), timeout=10)
-                response.raise_for_status()
-                data = response.json()
+            data = await self._fetch_station()
         except Exception as e:
-            log.error(f"방송국 정보 조회 실패: {e}")
+            log.error("방송국 정보 조회 실패: %s", e)
             return None
 
-        broad_info = data.get("broad")
-        self.streamer_name = data.get("station", {}).get("user_nick", self.streamer_id)
+        broad_info = data["broad"]
+        self.streamer_name = data["user_nick"] or self.streamer_id
 
         if not broad_info:
             return None
 
         broad_no = broad_info["broad_no"]
         title = broad_info["broad_title"]
-        log.info(f"방송 감지됨: {title}")
+        log.info("방송 감지됨: %s", title)
+
+        # AID 토큰(프록시 경유)과 View URL(직통)은 서로 독립 -> 동시 요청으로 RTT 하나 절약
+        aid, res_view = await asyncio.gather(
+            self._get_aid_token(broad_no),
+            self._get_view(broad_no),
+            return_exceptions=True,
+        )
 
-        # 1. AID 토큰 획득 (여기서만 프록시 사용)
-        aid = await self._get_aid_token(broad_no)
-        if not aid:
+        if isinstance(aid, BaseException) or not aid:
             log.error("원본 화질 AID 토큰을 얻지 못했습니다. (WireGuard/프록시 상태를 확인하세요)")
             return None
-        
+
         try:
-            # 2. View URL 획득 (프록시 불필요)
-            params = { "return_type": "gcp_cdn", "broad_key": f"{broad_no}-common-original-hls" }
-            async with AsyncSession(impersonate="chrome110") as temp_session:
-                res_view = await temp_session.get(VIEW_URL, params=params, timeout=10)
-                res_view.raise_for_status()
-                view_data = res_view.json()
+            if isinstance(res_view, BaseException):
+                raise res_view
+            res_view.raise_for_status()
+            view_data = json_loads(res_view.content)
 
             if view_data.get("view_url"):
                 m3u8_url = f"{view_data['view_url']}?aid={aid}"
@@ -143,18 +374,199 @@ class SoopRecorder:
                 log.error("스트림 주소(view_url)를 가져오지 못했습니다.")
                 return None
         except Exception as e:
-            log.error(f"스트림 주소 요청 중 오류 발생: {e}")
+            log.error("스트림 주소 요청 중 오류 발생: %s", e)
             return None
 
+    @staticmethod
+    def _parse_m3u8(playlist, base_url):
+        """미디어 플레이리스트에서 (시퀀스 번호, 타깃 길이, 세그먼트 URL 목록, 종료 여부)를 추출합니다."""
+        media_seq = 0
+        target_duration = 2.0
+        segments = []
+        ended = False
+        for line in playlist.splitlines():
+            line = line.strip()
+            if line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+                media_seq = int(line.split(":", 1)[1])
+            elif line.startswith("#EXT-X-TARGETDURATION:"):
+                target_duration = float(line.split(":", 1)[1])
+            elif line == "#EXT-X-ENDLIST":
+                ended = True
+            elif line and not line.startswith("#"):
+                segments.append(line if line.startswith("http") else f"{base_url}/{line}")
+        return media_seq, target_duration, segments, ended
+
+    async def _write_segments(self, queue, f):
+        """큐에 들어온 세그먼트를 단일 코루틴에서 순서대로 파일에 씁니다.
+
+        쓰기를 한 곳으로 모으면 파일시스템에 순차 쓰기가 보장되고 aiofiles의
+        스레드 풀 경합도 없습니다. 플러시는 세그먼트마다가 아니라 N MiB마다 합니다.
+        """
+        unflushed = 0
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            await f.write(chunk)
+            unflushed += len(chunk)
+            if unflushed >= self.FLUSH_EVERY:
+                await f.flush()
+                unflushed = 0
+
+    async def _hls_download(self, m3u8_url, output_path):
+        """외부 프로세스 없이 HLS 세그먼트를 직접 받아 파일에 이어 씁니다.
+
+        이미 위장된 direct_session을 재사용하므로 세그먼트마다 TLS 핸드셰이크를
+        다시 하지 않고, streamlink 프로세스 기동 비용도 없습니다.
+        """
+        # 무거운 의존성이라 첫 녹화 시점에 로드. 미설치 시 ImportError가
+        # 쓰기 태스크 안이 아니라 여기서 나서 record_stream의 예외 처리로 전파됨
+        import aiofiles
+
+        base_url = m3u8_url.split("?")[0].rsplit("/", 1)[0]
+        headers = {"Referer": f"https://play.sooplive.co.kr/{self.streamer_id}"}
+        sem = asyncio.Semaphore(self.HLS_CONCURRENCY)
+        last_seq = -1
+        playlist_errors = 0
+
+        async def fetch(url):
+            async with sem:
+                res = await self.direct_session.get(url, headers=headers, timeout=15)
+                res.raise_for_status()
+                return res.content
+
+        # 다운로드와 디스크 쓰기를 분리: 쓰기는 전담 코루틴이 큐를 소비
+        queue = asyncio.Queue(maxsize=self.HLS_CONCURRENCY * 2)
+        f = await aiofiles.open(output_path, "ab", buffering=self.WRITE_BUFFER)
+        writer = asyncio.create_task(self._write_segments(queue, f))
+
+        async def enqueue(chunk):
+            # 쓰기 태스크가 죽으면 (디스크 풀 등) put이 가득 찬 큐에서 영원히 막히므로
+            # put과 writer 종료를 경합시켜 쓰기 예외를 즉시 끌어올림
+            put = asyncio.create_task(queue.put(chunk))
+            await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if writer.done():
+                put.cancel()
+                exc = writer.exception()
+                raise exc if exc is not None else RuntimeError("쓰기 태스크가 조기 종료되었습니다")
+
+        try:
+            while True:
+                try:
+                    res = await self.direct_session.get(m3u8_url, headers=headers, timeout=10)
+                    if res.status_code == 404:
+                        break  # 방송 종료
+                    res.raise_for_status()
+                    playlist = res.text
+                except Exception as e:
+                    playlist_errors += 1
+                    if playlist_errors >= 5:
+                        log.warning("플레이리스트 요청 연속 실패, 녹화를 종료합니다: %s", e)
+                        break
+                    await asyncio.sleep(2)
+                    continue
+                playlist_errors = 0
+
+                media_seq, target_duration, segments, ended = self._parse_m3u8(playlist, base_url)
+
+                new = [(media_seq + i, url) for i, url in enumerate(segments) if media_seq + i > last_seq]
+                if new:
+                    datas = await asyncio.gather(*(fetch(url) for _, url in new), return_exceptions=True)
+                    for (seq, _), data in zip(new, datas):
+                        if isinstance(data, BaseException):
+                            log.warning("세그먼트 다운로드 실패 (seq=%s): %s", seq, data)
+                            continue
+                        await enqueue(data)
+                    last_seq = new[-1][0]
+
+                if ended:
+                    break
+                await asyncio.sleep(target_duration / 2 if new else target_duration)
+        finally:
+            if not writer.done():
+                try:
+                    # 살아 있는 writer는 큐를 곧 비우므로 짧은 대기면 충분
+                    await asyncio.wait_for(queue.put(None), timeout=10)
+                except asyncio.TimeoutError:
+                    writer.cancel()
+            try:
+                await writer  # 쓰기 예외는 여기서 record_stream의 예외 처리로 전파
+            except asyncio.CancelledError:
+                pass
+            finally:
+                await f.close()
+
     async def record_stream(self, stream_info):
-        """Streamlink를 사용하여 녹화 (오디오/비디오 동기화 해결)"""
-        m3u8_url = stream_info["m3u8_url"]
+        """방송을 녹화합니다. 기본은 내장 HLS 다운로더, --use-streamlink 시 streamlink 사용."""
         title = clean_filename(stream_info["title"])
         streamer_name = clean_filename(self.streamer_name)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_filename = self.output_dir / f"[{streamer_name}]_{timestamp}_{title}.ts"
 
-        log.info(f"녹화를 시작합니다: {output_filename.name}")
+        log.info("녹화를 시작합니다: %s", output_filename.name)
+
+        if not self.use_streamlink:
+            try:
+                await self._hls_download(stream_info["m3u8_url"], output_filename)
+                log.info("녹화가 정상적으로 완료되었습니다.")
+            except Exception as e:
+                log.error("녹화 중 예외 발생: %s", e)
+            return
+
+        await self._record_with_streamlink(stream_info, output_filename)
+
+    @staticmethod
+    async def _drain_stderr(stream):
+        """자식 프로세스의 stderr를 실시간으로 읽어 DEBUG 로그로 흘립니다."""
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            log.debug("[streamlink] %s", line.decode(errors="replace").rstrip()[:500])
+
+    def _streamlink_api_record(self, m3u8_url, output_filename):
+        """streamlink 파이썬 API로 녹화합니다. (블로킹 - 워커 스레드에서 실행)
+
+        Streamlink 세션(플러그인 로드 포함)을 한 번만 만들어 방송마다 재사용하므로
+        녹화 시작 때마다 인터프리터+플러그인 로드를 다시 하지 않습니다.
+        """
+        from streamlink import Streamlink
+
+        if self._streamlink is None:
+            s = Streamlink()
+            s.set_option("http-headers", {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
+                "Referer": f"https://play.sooplive.co.kr/{self.streamer_id}",
+            })
+            self._streamlink = s
+
+        fd = self._streamlink.streams(f"hls://{m3u8_url}")["best"].open()
+        try:
+            with open(output_filename, "wb") as out:
+                while True:
+                    chunk = fd.read(65536)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+        finally:
+            fd.close()
+
+    async def _record_with_streamlink(self, stream_info, output_filename):
+        """streamlink로 녹화합니다. 모듈이 임포트 가능하면 프로세스 기동 없이 API를 씁니다."""
+        if importlib.util.find_spec("streamlink") is not None:
+            try:
+                await asyncio.to_thread(self._streamlink_api_record, stream_info["m3u8_url"], output_filename)
+                log.info("녹화가 정상적으로 완료되었습니다.")
+            except Exception as e:
+                log.error("녹화 중 예외 발생: %s", e)
+            return
+
+        # 모듈이 없으면 (독립 실행형 설치 등) 기존 subprocess 방식으로 폴백
+        await self._record_with_streamlink_subprocess(stream_info, output_filename)
+
+    async def _record_with_streamlink_subprocess(self, stream_info, output_filename):
+        """Streamlink를 사용하여 녹화 (오디오/비디오 동기화 해결)"""
+        m3u8_url = stream_info["m3u8_url"]
 
         # 헤더 설정
         referer = f"https://play.sooplive.co.kr/{self.streamer_id}"
@@ -172,44 +584,65 @@ class SoopRecorder:
         ]
 
         try:
+            # stdout은 보지 않으므로 버리고, stderr는 백그라운드에서 줄 단위로 비움
+            # (communicate()는 방송 내내 출력을 메모리에 쌓으므로 사용하지 않음)
             process = await asyncio.create_subprocess_exec(
                 *streamlink_cmd,
-                stdout=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
                 stderr=asyncio.subprocess.PIPE
             )
-            
+            drain_task = asyncio.create_task(self._drain_stderr(process.stderr))
+
             log.info("방송이 종료되거나 Ctrl+C를 누를 때까지 녹화합니다...")
-            
+
             # 녹화 진행
-            await process.communicate()
-            
+            await process.wait()
+            await drain_task
+
             if process.returncode == 0:
                 log.info("녹화가 정상적으로 완료되었습니다.")
             else:
-                log.warning(f"녹화가 종료되었습니다 (종료 코드: {process.returncode}).")
+                log.warning("녹화가 종료되었습니다 (종료 코드: %s).", process.returncode)
 
         except FileNotFoundError:
             log.error("streamlink가 설치되어 있지 않습니다. (pip install streamlink)")
             sys.exit(1)
         except Exception as e:
-            log.error(f"녹화 중 예외 발생: {e}")
+            log.error("녹화 중 예외 발생: %s", e)
+
+    def _next_sleep(self, error=False):
+        """연속 미감지/오류 횟수에 따라 다음 폴링 간격을 계산합니다 (지수 백오프 + 지터)."""
+        if error:
+            base = min(self.MAX_ERROR_INTERVAL,
+                       self.poll_interval * 2 ** min(self.consecutive_errors, self.BACKOFF_CAP))
+        else:
+            base = min(self.MAX_POLL_INTERVAL,
+                       self.poll_interval * 2 ** min(self.consecutive_misses, self.BACKOFF_CAP))
+        return base * random.uniform(0.8, 1.2)
 
     async def run(self):
-        log.info(f"'{self.streamer_name}' ({self.streamer_id}) 방송 감시 시작... (주기: {self.poll_interval}초)")
+        log.info("'%s' (%s) 방송 감시 시작... (주기: %s초)", self.streamer_name, self.streamer_id, self.poll_interval)
         while True:
             try:
                 stream_info = await self.check_stream_status()
                 if stream_info:
+                    self.consecutive_misses = 0
+                    self.consecutive_errors = 0
                     await self.record_stream(stream_info)
                     log.info("녹화 종료. 1분 대기.")
                     await asyncio.sleep(60)
                 else:
-                    await asyncio.sleep(self.poll_interval)
+                    sleep_for = self._next_sleep()
+                    self.consecutive_misses += 1
+                    self.consecutive_errors = 0
+                    await asyncio.sleep(sleep_for)
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                log.error(f"오류: {e}")
-                await asyncio.sleep(self.poll_interval)
+                log.error("오류: %s", e)
+                sleep_for = self._next_sleep(error=True)
+                self.consecutive_errors += 1
+                await asyncio.sleep(sleep_for)
 
 async def main():
     # 1. 설정 파일 로드
@@ -217,66 +650,96 @@ async def main():
 
     # 2. 명령행 인자 파싱
     parser = argparse.ArgumentParser(description="SOOP 1080p 녹화기")
-    parser.add_argument("streamer_id", nargs='?', help="녹화할 스트리머 ID")
+    parser.add_argument("streamer_ids", nargs='*', help="녹화할 스트리머 ID (여러 개 가능)")
     parser.add_argument("-o", "--output-dir", help="저장 폴더")
     parser.add_argument("-i", "--poll-interval", type=int, help="확인 주기(초)")
     parser.add_argument("--wg-conf", help="WireGuard 설정 파일 경로")
     parser.add_argument("--wireproxy-path", help="wireproxy 실행 파일 경로")
     parser.add_argument("-p", "--proxy", help="수동 프록시 주소")
-    
+    parser.add_argument("--use-streamlink", action="store_true", help="내장 다운로더 대신 streamlink 사용")
+
     args = parser.parse_args()
 
-    # 3. 설정 값 병합
-    streamer_id = args.streamer_id or config.get("streamer_id")
+    # 3. 설정 값 병합 (settings.json의 "streamers" 리스트 또는 단일 "streamer_id" 지원)
+    streamer_ids = list(args.streamer_ids) or config.get("streamers") or []
+    if not streamer_ids and config.get("streamer_id"):
+        streamer_ids = [config["streamer_id"]]
     output_dir = args.output_dir or config.get("output_dir", ".")
     poll_interval = args.poll_interval or config.get("poll_interval", 15)
     wg_conf = args.wg_conf or config.get("wg_conf")
     wireproxy_path = args.wireproxy_path or config.get("wireproxy_path", "wireproxy") # PATH에 있으면 그냥 wireproxy
     active_proxy = args.proxy or config.get("proxy")
+    use_streamlink = args.use_streamlink or config.get("use_streamlink", False)
+    configure_rate_limit(config.get("max_qps", 2))
 
-    if not streamer_id:
+    if not streamer_ids:
         log.error("스트리머 ID가 없습니다. (명령행 인자 또는 settings.json 확인)")
         sys.exit(1)
 
-    # streamlink 체크
-    try:
-        subprocess.run(["streamlink", "--version"], capture_output=True, check=True)
-    except:
-        log.error("streamlink가 설치되어 있지 않습니다.")
-        sys.exit(1)
+    # streamlink 체크 (streamlink 모드에서만 필수)
+    # 프로세스를 띄워 --version을 묻는 대신 모듈/실행 파일 존재만 확인 (수백 ms 절약)
+    if use_streamlink:
+        if importlib.util.find_spec("streamlink") is None and shutil.which("streamlink") is None:
+            log.error("streamlink가 설치되어 있지 않습니다.")
+            sys.exit(1)
 
     wg_process = None
 
     # WireGuard 자동 실행
     if wg_conf:
-        log.info(f"WireGuard 프록시 시작 중... (설정: {wg_conf})")
+        log.info("WireGuard 프록시 시작 중... (설정: %s)", wg_conf)
         try:
             # 에러 확인을 위해 stdout/stderr DEVNULL 제거
             wg_process = subprocess.Popen(
                 [wireproxy_path, "-c", wg_conf]
             )
-            time.sleep(2)
-            
-            if wg_process.poll() is not None:
-                log.error("wireproxy 실행 실패. 설정 파일에 [Socks5] 섹션이 있는지 확인하세요.")
-                sys.exit(1)
-            
+
+            # 고정 2초 대기 대신 SOCKS 포트가 열릴 때까지 폴링 (보통 1초 미만에 준비됨)
+            deadline = time.monotonic() + 10
+            while True:
+                if wg_process.poll() is not None:
+                    log.error("wireproxy 실행 실패. 설정 파일에 [Socks5] 섹션이 있는지 확인하세요.")
+                    sys.exit(1)
+                try:
+                    socket.create_connection(("127.0.0.1", 1080), timeout=0.2).close()
+                    break
+                except OSError:
+                    if time.monotonic() >= deadline:
+                        log.error("wireproxy가 10초 내에 준비되지 않았습니다.")
+                        wg_process.terminate()
+                        sys.exit(1)
+                    time.sleep(0.1)
+
             log.info("WireGuard 프록시 활성화됨 (127.0.0.1:1080)")
             active_proxy = "socks5://127.0.0.1:1080"
             
         except FileNotFoundError:
-            log.error(f"'{wireproxy_path}' 파일을 찾을 수 없습니다.")
+            log.error("'%s' 파일을 찾을 수 없습니다.", wireproxy_path)
             sys.exit(1)
 
     try:
-        async with SoopRecorder(
-            streamer_id=streamer_id,
-            output_dir=output_dir,
-            proxy=active_proxy,
-            poll_interval=poll_interval
-        ) as recorder:
-            await recorder.run()
-            
+        # 스트리머별 레코더를 한 이벤트 루프에서 동시에 실행
+        # 첫 레코더가 세션을 만들고 나머지는 그것을 공유 (커넥션 풀/DNS 캐시 통일)
+        async with contextlib.AsyncExitStack() as stack:
+            recorders = []
+            first = None
+            for sid in streamer_ids:
+                recorder = SoopRecorder(
+                    streamer_id=sid,
+                    output_dir=output_dir,
+                    proxy=active_proxy,
+                    poll_interval=poll_interval,
+                    use_streamlink=use_streamlink,
+                    session=first.session if first else None,
+                    direct_session=first.direct_session if first else None,
+                )
+                await stack.enter_async_context(recorder)
+                if first is None:
+                    first = recorder
+                recorders.append(recorder)
+
+            await asyncio.gather(*(r.run() for r in recorders))
+
     except KeyboardInterrupt:
         log.info("종료 중...")
     
@@ -290,4 +753,16 @@ async def main():
                 wg_process.kill()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # uvloop: libuv 기반 이벤트 루프. 소켓 I/O 위주인 이 프로그램에 유리
+    # (Windows 등 uvloop이 없는 환경에서는 기본 루프 사용)
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        if sys.platform == "win32":
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
\ No newline at end of file